@@ -1,66 +1,470 @@
 # agent.py
 
 import os
+import re
+import copy
+import sys
 import json
-import requests
-from datetime import datetime
+import time
+import string
+import sqlite3
+import math
+import hashlib
+import asyncio
+import threading
+import httpx
+import orjson
+from collections import OrderedDict
+from contextlib import aclosing, closing, nullcontext
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from langchain.schema import HumanMessage
 
 # Load environment variables
 load_dotenv()
 
+MODEL_NAME = "gemini-2.0-flash"
+CACHE_PATH = os.path.expanduser("~/.roadmap_cache.db")
+CACHE_TTL = 7 * 86400  # One week
+EMBEDDING_MODEL = "models/embedding-001"
+SIMILARITY_THRESHOLD = 0.92
+
+# DuckDuckGo retry policy
+SEARCH_RETRIES = 5
+SEARCH_BACKOFF = 1  # Seconds, doubled on each retry
+RETRY_STATUSES = {403, 408, 429, 500, 502, 503, 504}
+SEARCH_FAILURE_LIMIT = 8  # Consecutive failed attempts (two rounds of 4 queries) before pausing
+SEARCH_PAUSE = 300  # Seconds to stop querying once DuckDuckGo is degraded
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 3600  # One hour
+SEARCH_HEADERS = {"User-Agent": "job-roadmap-agent/1.0"}
+SEARCH_UNAVAILABLE = "Search unavailable. Using standard interview process for the role."
+
+# A JD at least this long that mentions the interview process needs no web search
+JD_SUFFICIENT_LENGTH = 1200
+JD_ONLY_INFO = "Not searched; rely on the job description above."
+
+# Where the prompt's company info came from; part of the roadmap cache key
+INFO_FROM_JD = "jd"
+INFO_FROM_SEARCH = "search"
+INFO_FALLBACK = "fallback"  # Search failed; roadmaps built on this are never cached
+
+# JSON object inside a ``` or ```json fence, or anywhere in the text
+_FENCED_JSON_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+_JSON_RE = re.compile(r"(\{.*\})", re.DOTALL)
+
+# Whole words that show a JD describes the interview process itself
+_JD_PROCESS_RE = re.compile(r"\b(interviews?|rounds?|screening)\b", re.IGNORECASE)
+
+# JSON array of roadmaps returned by a batched request
+_FENCED_JSON_ARRAY_RE = re.compile(r"```(?:json)?\s*(\[.*?\])\s*```", re.DOTALL)
+_JSON_ARRAY_RE = re.compile(r"(\[.*\])", re.DOTALL)
+
+# Fields a batched roadmap must contain before it is used or cached
+REQUIRED_ROADMAP_FIELDS = ("rounds", "difficulty", "recommended_order")
+
+# Characters replaced with underscores in saved roadmap filenames
+_FILENAME_TRANS = str.maketrans({" ": "_", "/": "_", "\\": "_", ":": "_"})
+
+# In-memory LRU of DuckDuckGo results: normalized query -> (expires_at, result)
+_search_cache = OrderedDict()
+
+def expected_info_source(jd_text: str) -> str:
+    """Where company info comes from when everything works, used for cache lookups"""
+    return INFO_FROM_JD if is_jd_sufficient(jd_text) else INFO_FROM_SEARCH
+
+def fallback_company_info(company: str, role: str) -> str:
+    """Generic interview process used when the search returns nothing usable"""
+    return f"""
+        Standard interview process for {role} positions at {company}. 
+        Typically includes:
+        - Technical screening round with coding questions
+        - System design discussion for mid-level and above roles
+        - Behavioral and cultural fit interviews
+        - Possible take-home assignment or live coding session
+        
+        Focus on data structures, algorithms, and company-specific technologies.
+        """
+
+def is_jd_sufficient(jd_text: str) -> bool:
+    """Check whether the JD alone is detailed enough to skip the company search"""
+    if len(jd_text) < JD_SUFFICIENT_LENGTH:
+        return False
+    return _JD_PROCESS_RE.search(jd_text) is not None
+
+def is_valid_roadmap(roadmap) -> bool:
+    """Check that a generated roadmap has the fields the rest of the app relies on"""
+    return isinstance(roadmap, dict) and all(
+        roadmap.get(field) for field in REQUIRED_ROADMAP_FIELDS
+    )
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query for cache lookups"""
+    return " ".join(query.lower().split())
+
+def get_cached_search(query: str):
+    """Return a cached search result, or None if missing or expired"""
+    entry = _search_cache.get(query)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        del _search_cache[query]
+        return None
+    _search_cache.move_to_end(query)
+    return entry[1]
+
+def set_cached_search(query: str, result: str):
+    """Store a search result, evicting the least recently used entry when full"""
+    _search_cache[query] = (time.monotonic() + SEARCH_CACHE_TTL, result)
+    _search_cache.move_to_end(query)
+    if len(_search_cache) > SEARCH_CACHE_SIZE:
+        _search_cache.popitem(last=False)
+
+# Example roadmap shown to the model, kept as a plain constant
+_EXAMPLE_JSON = """{
+    "company": "Google",
+    "role": "SDE1",
+    "rounds": [
+        {"type": "Technical Screening", "topics": ["Data Structures", "Algorithms", "Problem Solving"]},
+        {"type": "Coding Round", "topics": ["System Design", "Object-Oriented Programming", "API Design"]},
+        {"type": "System Design", "topics": ["Microservices", "Scalability", "Database Design"]},
+        {"type": "Behavioral", "topics": ["Teamwork", "Communication", "Leadership"]}
+    ],
+    "difficulty": "Hard",
+    "recommended_order": ["Data Structures", "Algorithms", "System Design", "Behavioral"],
+    "evidence": {
+        "key_skills": ["Python", "AWS", "Docker"],
+        "topic_count": 4
+    }
+}"""
+
+# Fixed part of the roadmap prompt, shared verbatim by every request
+STATIC_INSTRUCTIONS = """Create a comprehensive interview preparation roadmap based on the job description and company information given at the end of this message.
+
+Please provide a structured roadmap in JSON format with these exact fields:
+- company: Company name
+- role: Job role
+- rounds: List of 3-5 interview rounds, each with "type" and "topics" (list of 3-5 topics per round)
+- difficulty: Overall difficulty (Easy, Medium, Hard, Very Hard)
+- recommended_order: Suggested study order of main topics
+- evidence: Object with "key_skills" (from JD) and "topic_count"
+
+Return ONLY valid JSON without any additional text, comments, or explanations.
+
+Example format:
+""" + _EXAMPLE_JSON + "\n\n"
+
+# Static fields of the fallback roadmap; company, role and generated_at are filled per call
+_DEFAULT_ROADMAP = {
+    "company": None,
+    "role": None,
+    "rounds": [
+        {"type": "Technical Screening", "topics": ["Data Structures", "Algorithms", "Problem Solving"]},
+        {"type": "Coding Round", "topics": ["System Design", "Object-Oriented Programming"]},
+        {"type": "System Design", "topics": ["Microservices", "Scalability", "Database Design"]},
+        {"type": "Behavioral", "topics": ["Teamwork", "Communication", "Experience"]}
+    ],
+    "difficulty": "Medium",
+    "recommended_order": ["Data Structures", "Algorithms", "System Design", "Behavioral"],
+    "evidence": {
+        "key_skills": ["General Programming", "Problem Solving"],
+        "topic_count": 4
+    },
+    "generated_at": None,
+    "version": "1.0",
+    "note": "Default roadmap - AI generation failed"
+}
+
+# Per-job fields, substituted into precompiled templates after the static prefix
+_JOB_FIELDS = """COMPANY: $company
+ROLE: $role
+
+JOB DESCRIPTION:
+$jd_text
+
+COMPANY INTERVIEW INFO:
+$company_info
+"""
+_PROMPT_TEMPLATE = string.Template(STATIC_INSTRUCTIONS + _JOB_FIELDS)
+_BATCH_JOB_TEMPLATE = string.Template("JOB $number:\n" + _JOB_FIELDS)
+
+def cosine_similarity(a: list, b: list) -> float:
+    """Cosine similarity between two embedding vectors"""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+class LLMCache:
+    """Persistent SQLite cache for generated roadmaps with per-entry TTL
+
+    The cache is only an optimisation: any SQLite error is reported and
+    treated as a cache miss instead of failing roadmap generation.
+    """
+    
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self.available = True
+        try:
+            with closing(sqlite3.connect(self.path)) as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS roadmaps "
+                    "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings "
+                    "(company TEXT NOT NULL, role TEXT NOT NULL, embedding BLOB NOT NULL, "
+                    "value BLOB NOT NULL, expires_at REAL NOT NULL)"
+                )
+        except sqlite3.Error as e:
+            print(f"⚠️ Roadmap cache disabled ({self.path}): {e}")
+            self.available = False
+    
+    @staticmethod
+    def make_key(company: str, role: str, jd_text: str, info_source: str) -> str:
+        """Hash the inputs that determine the LLM output"""
+        payload = json.dumps(
+            {"company": company, "role": role, "jd": jd_text, "model": MODEL_NAME,
+             "info_source": info_source},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str):
+        """Return the cached roadmap, or None if missing, expired or unreadable"""
+        if not self.available:
+            return None
+        try:
+            with closing(sqlite3.connect(self.path)) as conn, conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM roadmaps WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] < time.time():
+                    conn.execute("DELETE FROM roadmaps WHERE key = ?", (key,))
+                    return None
+        except sqlite3.Error as e:
+            print(f"⚠️ Roadmap cache read failed: {e}")
+            return None
+        return orjson.loads(row[0])
+    
+    def set(self, key: str, roadmap: dict, ttl: int = CACHE_TTL):
+        """Store a roadmap that expires after ttl seconds"""
+        if not self.available:
+            return
+        try:
+            with closing(sqlite3.connect(self.path)) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO roadmaps (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, orjson.dumps(roadmap), time.time() + ttl)
+                )
+        except sqlite3.Error as e:
+            print(f"⚠️ Roadmap cache write failed: {e}")
+    
+    def get_similar(self, company: str, role: str, embedding: list,
+                    threshold: float = SIMILARITY_THRESHOLD):
+        """Return the closest cached roadmap for the same company and role above threshold"""
+        if not self.available:
+            return None
+        try:
+            with closing(sqlite3.connect(self.path)) as conn, conn:
+                conn.execute("DELETE FROM embeddings WHERE expires_at < ?", (time.time(),))
+                rows = conn.execute(
+                    "SELECT embedding, value FROM embeddings WHERE company = ? AND role = ?",
+                    (company.lower(), role.lower())
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"⚠️ Roadmap cache read failed: {e}")
+            return None
+        
+        best_score, best_value = threshold, None
+        for stored_embedding, value in rows:
+            score = cosine_similarity(embedding, orjson.loads(stored_embedding))
+            if score >= best_score:
+                best_score, best_value = score, value
+        
+        return orjson.loads(best_value) if best_value is not None else None
+    
+    def add_similar(self, company: str, role: str, embedding: list, roadmap: dict,
+                    ttl: int = CACHE_TTL):
+        """Store a roadmap with its JD embedding for similarity lookups"""
+        if not self.available:
+            return
+        try:
+            with closing(sqlite3.connect(self.path)) as conn, conn:
+                conn.execute(
+                    "INSERT INTO embeddings (company, role, embedding, value, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (company.lower(), role.lower(), orjson.dumps(embedding),
+                     orjson.dumps(roadmap), time.time() + ttl)
+                )
+        except sqlite3.Error as e:
+            print(f"⚠️ Roadmap cache write failed: {e}")
+
 class RoadmapGenerator:
+    # Model clients shared by all instances, created on first use
+    _llm = None
+    _embeddings = None
+    _client_lock = threading.Lock()
+    
     def __init__(self):
         # Initialize LLM
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            google_api_key=os.getenv("GOOGLE_API_KEY"),
-            temperature=0.1
-        )
+        self.llm = self._get_llm()
+        
+        # Persistent response cache for repeated inputs
+        self.cache = LLMCache()
+        
+        # Embeddings for matching near-identical job descriptions
+        self.embeddings = self._get_embeddings()
+        
+        # Consecutive failed DuckDuckGo attempts and the time until searches resume
+        self.search_failures = 0
+        self.search_paused_until = 0.0
     
-    def search_duckduckgo(self, query: str) -> str:
-        """Search using DuckDuckGo API"""
+    @classmethod
+    def _get_llm(cls) -> ChatGoogleGenerativeAI:
+        """Return the shared LLM client, creating it once"""
+        if cls._llm is None:
+            with cls._client_lock:
+                if cls._llm is None:
+                    cls._llm = ChatGoogleGenerativeAI(
+                        model=MODEL_NAME,
+                        google_api_key=os.getenv("GOOGLE_API_KEY"),
+                        temperature=0.1
+                    )
+        return cls._llm
+    
+    @classmethod
+    def _get_embeddings(cls) -> GoogleGenerativeAIEmbeddings:
+        """Return the shared embeddings client, creating it once"""
+        if cls._embeddings is None:
+            with cls._client_lock:
+                if cls._embeddings is None:
+                    cls._embeddings = GoogleGenerativeAIEmbeddings(
+                        model=EMBEDDING_MODEL,
+                        google_api_key=os.getenv("GOOGLE_API_KEY")
+                    )
+        return cls._embeddings
+    
+    def embed_job(self, company: str, role: str, jd_text: str):
+        """Embed the job inputs for semantic cache lookups"""
         try:
-            url = "https://api.duckduckgo.com/"
-            params = {
-                'q': query,
-                'format': 'json',
-                'no_html': '1',
-                'skip_disambig': '1'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-            
-            # Extract relevant information
-            results = []
-            
-            # Abstract from DuckDuckGo
-            if data.get('Abstract'):
-                results.append(data['Abstract'])
-            
-            # Related topics
-            if data.get('RelatedTopics'):
-                for topic in data['RelatedTopics'][:3]:  # Limit to first 3 topics
-                    if 'Text' in topic:
-                        results.append(topic['Text'])
+            return self.embeddings.embed_query(f"{company}\n{role}\n{jd_text}")
+        except Exception as e:
+            print(f"⚠️ Embedding failed, skipping semantic cache: {e}")
+            return None
+    
+    async def _search_duckduckgo_async(self, client: httpx.AsyncClient, query: str) -> str:
+        """Search using DuckDuckGo API, retrying transient failures"""
+        url = "https://api.duckduckgo.com/"
+        params = {
+            'q': query,
+            'format': 'json',
+            'no_html': '1',
+            'skip_disambig': '1'
+        }
+        
+        # Retry transient failures with exponential backoff
+        for attempt in range(SEARCH_RETRIES + 1):
+            # Skip the network entirely while DuckDuckGo looks degraded
+            if time.monotonic() < self.search_paused_until:
+                return SEARCH_UNAVAILABLE
             
-            # If no results found, return a generic response
-            if not results:
-                return f"Search for '{query}' didn't return specific results. Using standard interview process."
+            try:
+                response = await client.get(url, params=params, timeout=10)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    data = orjson.loads(response.content)
+                    if not isinstance(data, dict):
+                        raise ValueError(f"unexpected response type {type(data).__name__}")
+                    break
+                error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                error = e
+            except (httpx.HTTPStatusError, ValueError) as e:
+                print(f"⚠️ DuckDuckGo search failed: {e}")
+                return SEARCH_UNAVAILABLE
             
-            return " ".join(results)[:1500]  # Limit length
+            # Failed attempts are counted across all in-flight queries, so a
+            # parallel search stops retrying once DuckDuckGo is clearly down
+            self.search_failures += 1
+            if (self.search_failures >= SEARCH_FAILURE_LIMIT
+                    and time.monotonic() >= self.search_paused_until):
+                print("⚠️ DuckDuckGo appears degraded, pausing further searches")
+                self.search_paused_until = time.monotonic() + SEARCH_PAUSE
             
-        except Exception as e:
-            print(f"⚠️ DuckDuckGo search failed: {e}")
-            return f"Search unavailable. Using standard interview process for the role."
+            if attempt < SEARCH_RETRIES:
+                await asyncio.sleep(SEARCH_BACKOFF * 2 ** attempt)
+        else:
+            print(f"⚠️ DuckDuckGo search failed after {SEARCH_RETRIES} retries: {error}")
+            return SEARCH_UNAVAILABLE
+        
+        self.search_failures = 0
+        
+        # Abstract plus the first 3 related topics, skipping empty entries
+        parts = [data.get('Abstract', '')] + [
+            topic.get('Text', '') for topic in data.get('RelatedTopics', [])[:3]
+        ]
+        results = [part for part in parts if part]
+        
+        # If no results found, return a generic response
+        if not results:
+            return f"Search for '{query}' didn't return specific results. Using standard interview process."
+        
+        return " ".join(results)[:1500]  # Limit length
+    
+    def _new_search_client(self) -> httpx.AsyncClient:
+        """Create a DuckDuckGo client; HTTP/2 lets parallel queries share one TLS connection"""
+        limits = httpx.Limits(max_connections=8, max_keepalive_connections=5)
+        return httpx.AsyncClient(http2=True, timeout=10.0, limits=limits,
+                                 headers=SEARCH_HEADERS)
+    
+    async def _gather(self, queries: list, client: httpx.AsyncClient = None) -> list:
+        """Run all DuckDuckGo queries concurrently over one shared client"""
+        keys = [normalize_query(query) for query in queries]
+        results = {key: get_cached_search(key) for key in keys}
+        
+        # Only hit the network for distinct queries not answered from the cache
+        pending = [key for key, result in results.items() if result is None]
+        if pending:
+            # Reuse the caller's client (and its open connections) when given one
+            client_context = nullcontext(client) if client else self._new_search_client()
+            async with client_context as search_client:
+                fetched = await asyncio.gather(
+                    *[self._search_duckduckgo_async(search_client, key) for key in pending],
+                    return_exceptions=True
+                )
+            for key, result in zip(pending, fetched):
+                results[key] = result
+                if isinstance(result, str) and result != SEARCH_UNAVAILABLE:
+                    set_cached_search(key, result)
+        
+        return [results[key] for key in keys]
+    
+    def search_duckduckgo(self, query: str) -> str:
+        """Synchronous wrapper around _search_duckduckgo_async for a single query"""
+        result = asyncio.run(self._gather([query]))[0]
+        if isinstance(result, Exception):
+            print(f"⚠️ DuckDuckGo search failed: {result}")
+            return SEARCH_UNAVAILABLE
+        return result
     
     def search_company_info(self, company: str, role: str) -> str:
+        """Synchronous wrapper around search_company_info_async"""
+        return asyncio.run(self.search_company_info_async(company, role))
+    
+    async def search_company_info_async(self, company: str, role: str,
+                                        client: httpx.AsyncClient = None) -> str:
         """Search for company-specific interview information using DuckDuckGo"""
+        results = await self._search_company_results_async(company, role, client)
+        return results or fallback_company_info(company, role)
+    
+    async def _search_company_results_async(self, company: str, role: str,
+                                            client: httpx.AsyncClient = None) -> str:
+        """Combined DuckDuckGo results for the company, or "" if none were usable"""
         print(f"🔍 Searching DuckDuckGo for {company} {role} interview process...")
         
         queries = [
@@ -70,114 +474,156 @@ class RoadmapGenerator:
             f"how to prepare for {company} {role} interview"
         ]
         
+        # Queries run in parallel, so all of them cost roughly one round-trip
         all_results = []
-        for query in queries[:2]:  # Use first 2 queries to avoid too many requests
-            try:
-                result = self.search_duckduckgo(query)
-                if result and "didn't return specific results" not in result:
-                    all_results.append(result)
-            except Exception as e:
-                print(f"⚠️ Query '{query}' failed: {e}")
-        
-        if all_results:
-            combined_results = " ".join(all_results)
-            return combined_results[:2000]  # Limit total length
-        
-        # Fallback information
-        return f"""
-        Standard interview process for {role} positions at {company}. 
-        Typically includes:
-        - Technical screening round with coding questions
-        - System design discussion for mid-level and above roles
-        - Behavioral and cultural fit interviews
-        - Possible take-home assignment or live coding session
+        for query, result in zip(queries, await self._gather(queries, client)):
+            if isinstance(result, Exception):
+                print(f"⚠️ Query '{query}' failed: {result}")
+            elif (result and result != SEARCH_UNAVAILABLE
+                    and "didn't return specific results" not in result):
+                all_results.append(result)
         
-        Focus on data structures, algorithms, and company-specific technologies.
+        return " ".join(all_results)[:2000]  # Limit total length
+    
+    async def get_company_info_async(self, company: str, role: str, jd_text: str,
+                                     client: httpx.AsyncClient = None) -> tuple:
+        """Company info for the prompt and where it came from (INFO_FROM_* constants)
+
+        The JD alone is used when it already covers the interview process.
+        INFO_FALLBACK means the search produced nothing usable, so the
+        resulting roadmap should not be cached.
         """
+        if is_jd_sufficient(jd_text):
+            print("📄 Job description is detailed enough, skipping DuckDuckGo search")
+            return JD_ONLY_INFO, INFO_FROM_JD
+        
+        print("🌐 Gathering company information from DuckDuckGo...")
+        results = await self._search_company_results_async(company, role, client)
+        if results:
+            return results, INFO_FROM_SEARCH
+        return fallback_company_info(company, role), INFO_FALLBACK
     
     def extract_json_from_text(self, text: str) -> dict:
         """Extract JSON from LLM response"""
         try:
-            # Clean the text
-            cleaned = text.strip()
-            
-            # Try to find JSON in code blocks
-            if "```json" in cleaned:
-                cleaned = cleaned.split("```json")[1].split("```")[0].strip()
-            elif "```" in cleaned:
-                cleaned = cleaned.split("```")[1].split("```")[0].strip()
-            
-            # Find the first { and last }
-            start = cleaned.find('{')
-            end = cleaned.rfind('}') + 1
+            # Prefer a fenced code block, else the span from the first { to the last }
+            match = _FENCED_JSON_RE.search(text) or _JSON_RE.search(text)
+            if match:
+                return orjson.loads(match.group(1))
             
-            if start != -1 and end != 0:
-                json_str = cleaned[start:end]
-                return json.loads(json_str)
-            else:
-                # Try to parse the whole text as JSON
-                return json.loads(cleaned)
+            # Try to parse the whole text as JSON
+            return orjson.loads(text.strip())
                 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             print(f"❌ JSON parsing failed: {e}")
             print(f"Raw response: {text[:500]}...")
             # Return default structure
             return self.create_default_roadmap("Unknown", "Unknown")
     
+    async def stream_until_json_complete(self, prompt_text: str) -> str:
+        """Stream the LLM response and stop as soon as the top-level JSON object closes"""
+        chunks = []
+        depth = 0
+        started = False
+        in_string = False
+        escaped = False
+        
+        async with aclosing(self.llm.astream([HumanMessage(content=prompt_text)])) as stream:
+            async for chunk in stream:
+                chunks.append(chunk.content)
+                
+                # Track brace depth outside of JSON strings
+                for char in chunk.content:
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif char == "\\":
+                            escaped = True
+                        elif char == '"':
+                            in_string = False
+                    elif char == '"':
+                        in_string = started
+                    elif char == "{":
+                        depth += 1
+                        started = True
+                    elif char == "}" and started:
+                        depth -= 1
+                        if depth == 0:
+                            break
+                
+                # Skip any trailing prose or closing fence the model would still emit
+                if started and depth == 0:
+                    break
+        
+        return "".join(chunks)
+    
+    def extract_json_array_from_text(self, text: str) -> list:
+        """Extract a JSON array from a batched LLM response"""
+        try:
+            match = _FENCED_JSON_ARRAY_RE.search(text) or _JSON_ARRAY_RE.search(text)
+            data = orjson.loads(match.group(1) if match else text.strip())
+            if isinstance(data, list):
+                return data
+            print("❌ Batched response is not a JSON array")
+        except orjson.JSONDecodeError as e:
+            print(f"❌ JSON parsing failed: {e}")
+        
+        print(f"Raw response: {text[:500]}...")
+        return []
+    
     def generate_roadmap(self, company: str, role: str, jd_text: str) -> dict:
+        """Synchronous wrapper around generate_roadmap_async"""
+        return asyncio.run(self.generate_roadmap_async(company, role, jd_text))
+    
+    async def generate_roadmap_async(self, company: str, role: str, jd_text: str) -> dict:
         """Generate interview preparation roadmap"""
         print(f"🎯 Generating roadmap for {role} at {company}...")
         
-        # Step 1: Get company insights
-        print("🌐 Gathering company information from DuckDuckGo...")
-        company_info = self.search_company_info(company, role)
-        
-        # Step 2: Create prompt
-        prompt_text = f"""
-        Create a comprehensive interview preparation roadmap based on the job description and company information.
-        
-        COMPANY: {company}
-        ROLE: {role}
-        
-        JOB DESCRIPTION:
-        {jd_text}
-        
-        COMPANY INTERVIEW INFO:
-        {company_info}
-        
-        Please provide a structured roadmap in JSON format with these exact fields:
-        - company: Company name
-        - role: Job role  
-        - rounds: List of 3-5 interview rounds, each with "type" and "topics" (list of 3-5 topics per round)
-        - difficulty: Overall difficulty (Easy, Medium, Hard, Very Hard)
-        - recommended_order: Suggested study order of main topics
-        - evidence: Object with "key_skills" (from JD) and "topic_count"
-        
-        Return ONLY valid JSON without any additional text, comments, or explanations.
-        
-        Example format:
-        {{
-            "company": "Google",
-            "role": "SDE1",
-            "rounds": [
-                {{"type": "Technical Screening", "topics": ["Data Structures", "Algorithms", "Problem Solving"]}},
-                {{"type": "Coding Round", "topics": ["System Design", "Object-Oriented Programming", "API Design"]}},
-                {{"type": "System Design", "topics": ["Microservices", "Scalability", "Database Design"]}},
-                {{"type": "Behavioral", "topics": ["Teamwork", "Communication", "Leadership"]}}
-            ],
-            "difficulty": "Hard",
-            "recommended_order": ["Data Structures", "Algorithms", "System Design", "Behavioral"],
-            "evidence": {{
-                "key_skills": ["Python", "AWS", "Docker"],
-                "topic_count": 4
-            }}
-        }}
-        """
+        # Return a cached roadmap for identical inputs without calling the LLM
+        cache_key = self.cache.make_key(company, role, jd_text, expected_info_source(jd_text))
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            print("⚡ Using cached roadmap")
+            cached["generated_at"] = datetime.now(timezone.utc).isoformat()
+            return cached
+        
+        # One search client for the whole run so its connections are reused
+        async with self._new_search_client() as client:
+            # Step 1: Get company insights in the background while the JD is embedded
+            search_task = asyncio.create_task(
+                self.get_company_info_async(company, role, jd_text, client)
+            )
+            try:
+                embedding = await asyncio.to_thread(self.embed_job, company, role, jd_text)
+                
+                # Reuse the roadmap of a near-identical JD for the same company and role
+                if embedding is not None:
+                    similar = self.cache.get_similar(company, role, embedding)
+                    if similar is not None:
+                        print("⚡ Using cached roadmap from a similar job description")
+                        similar["company"] = company
+                        similar["role"] = role
+                        similar["generated_at"] = datetime.now(timezone.utc).isoformat()
+                        self.cache.set(cache_key, similar)
+                        return similar
+                
+                company_info, info_source = await search_task
+            finally:
+                # Never leave the search running on an early return or error,
+                # and let it finish cancelling before the client closes
+                if not search_task.done():
+                    search_task.cancel()
+                    await asyncio.wait([search_task])
+        
+        # Step 2: Create prompt - static instructions first so the prefix is
+        # byte-identical across calls, per-request fields last
+        prompt_text = _PROMPT_TEMPLATE.substitute(
+            company=company, role=role, jd_text=jd_text, company_info=company_info
+        )
         
         print("🧠 Generating roadmap with AI...")
         try:
-            response = self.llm.invoke([HumanMessage(content=prompt_text)])
-            response_text = response.content
+            response_text = await self.stream_until_json_complete(prompt_text)
         except Exception as e:
             print(f"❌ LLM call failed: {e}")
             # Return default roadmap
@@ -191,37 +637,117 @@ class RoadmapGenerator:
         roadmap["role"] = role
         
         # Add metadata
-        roadmap["generated_at"] = datetime.now().isoformat()
+        roadmap["generated_at"] = datetime.now(timezone.utc).isoformat()
         roadmap["version"] = "1.0"
         
+        # Only cache real LLM output built on real company info, not the
+        # parse-failure fallback or a roadmap made while the search was down
+        if info_source == INFO_FALLBACK:
+            print("⚠️ Company search failed, this roadmap will not be cached")
+        elif "note" not in roadmap:
+            self.cache.set(self.cache.make_key(company, role, jd_text, info_source), roadmap)
+            if embedding is not None:
+                self.cache.add_similar(company, role, embedding, roadmap)
+        
         print("✅ Roadmap generated successfully!")
         return roadmap
     
+    def generate_roadmaps_batch(self, items: list) -> list:
+        """Synchronous wrapper around generate_roadmaps_batch_async"""
+        return asyncio.run(self.generate_roadmaps_batch_async(items))
+    
+    async def generate_roadmaps_batch_async(self, items: list) -> list:
+        """Generate roadmaps for several (company, role, jd_text) items with one LLM call"""
+        print(f"🎯 Generating {len(items)} roadmaps in one batch...")
+        
+        # Serve what we can from the cache and batch only the misses
+        cache_keys = [
+            self.cache.make_key(company, role, jd_text, expected_info_source(jd_text))
+            for company, role, jd_text in items
+        ]
+        roadmaps = [self.cache.get(key) for key in cache_keys]
+        pending = [i for i, roadmap in enumerate(roadmaps) if roadmap is None]
+        
+        if pending:
+            async with self._new_search_client() as client:
+                company_infos = await asyncio.gather(
+                    *[self.get_company_info_async(*items[i], client) for i in pending]
+                )
+            
+            # One prompt covering all pending jobs, sharing the static instructions
+            jobs = []
+            for number, (i, (company_info, _)) in enumerate(zip(pending, company_infos), 1):
+                company, role, jd_text = items[i]
+                jobs.append(_BATCH_JOB_TEMPLATE.substitute(
+                    number=number, company=company, role=role,
+                    jd_text=jd_text, company_info=company_info
+                ))
+            prompt_text = (
+                STATIC_INSTRUCTIONS
+                + f"There are {len(jobs)} jobs below. Return ONLY a JSON array containing "
+                f"one roadmap object per job, in the same order as the jobs. Each roadmap "
+                f"must also include a \"job\" field with the number of the job it is for.\n\n"
+                + "\n".join(jobs)
+            )
+            
+            print("🧠 Generating roadmaps with AI...")
+            try:
+                response = await self.llm.ainvoke([HumanMessage(content=prompt_text)])
+                generated = self.extract_json_array_from_text(response.content)
+            except Exception as e:
+                print(f"❌ LLM call failed: {e}")
+                generated = []
+            
+            # Match roadmaps to jobs by the echoed job number, never by position
+            by_job = {}
+            for entry in generated:
+                if isinstance(entry, dict) and isinstance(entry.get("job"), int):
+                    by_job[entry.pop("job")] = entry
+            
+            # A short or mis-numbered response can't be trusted, so cache none of it
+            complete = len(generated) == len(pending) and sorted(by_job) == list(
+                range(1, len(pending) + 1)
+            )
+            if not complete:
+                print(f"⚠️ Expected {len(pending)} numbered roadmaps, got {len(generated)}; "
+                      f"results will not be cached")
+            
+            for number, (i, (_, info_source)) in enumerate(zip(pending, company_infos), 1):
+                company, role, jd_text = items[i]
+                roadmap = by_job.get(number)
+                if not is_valid_roadmap(roadmap):
+                    roadmaps[i] = self.create_default_roadmap(company, role)
+                    continue
+                
+                # Ensure company and role are set correctly
+                roadmap["company"] = company
+                roadmap["role"] = role
+                roadmap["version"] = "1.0"
+                if complete and info_source != INFO_FALLBACK:
+                    self.cache.set(
+                        self.cache.make_key(company, role, jd_text, info_source), roadmap
+                    )
+                roadmaps[i] = roadmap
+        
+        # Add metadata
+        generated_at = datetime.now(timezone.utc).isoformat()
+        for roadmap in roadmaps:
+            roadmap["generated_at"] = generated_at
+        
+        print("✅ Roadmaps generated successfully!")
+        return roadmaps
+    
     def create_default_roadmap(self, company: str, role: str) -> dict:
         """Create a default roadmap when AI generation fails"""
-        return {
-            "company": company,
-            "role": role,
-            "rounds": [
-                {"type": "Technical Screening", "topics": ["Data Structures", "Algorithms", "Problem Solving"]},
-                {"type": "Coding Round", "topics": ["System Design", "Object-Oriented Programming"]},
-                {"type": "System Design", "topics": ["Microservices", "Scalability", "Database Design"]},
-                {"type": "Behavioral", "topics": ["Teamwork", "Communication", "Experience"]}
-            ],
-            "difficulty": "Medium",
-            "recommended_order": ["Data Structures", "Algorithms", "System Design", "Behavioral"],
-            "evidence": {
-                "key_skills": ["General Programming", "Problem Solving"],
-                "topic_count": 4
-            },
-            "generated_at": datetime.now().isoformat(),
-            "version": "1.0",
-            "note": "Default roadmap - AI generation failed"
-        }
+        roadmap = copy.deepcopy(_DEFAULT_ROADMAP)
+        roadmap["company"] = company
+        roadmap["role"] = role
+        roadmap["generated_at"] = datetime.now(timezone.utc).isoformat()
+        return roadmap
     
     def save_roadmap(self, roadmap: dict, company: str, role: str):
         """Save roadmap to JSON file"""
-        filename = f"{company}_{role}_roadmap.json".replace(" ", "_").replace("/", "_").lower()
+        filename = f"{company}_{role}_roadmap.json".translate(_FILENAME_TRANS).lower()
         
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(roadmap, f, indent=2, ensure_ascii=False)
@@ -260,23 +786,16 @@ class RoadmapGenerator:
 def get_job_description():
     """Get job description from user input"""
     print("\nPlease paste the job description:")
-    print("(Enter your job description below. Press Ctrl+Z then Enter when finished on Windows)")
+    print("(Enter your job description below. Press Ctrl+D when finished, or Ctrl+Z then Enter on Windows)")
     print("="*50)
     
-    jd_lines = []
+    # Read everything up to EOF in one call instead of line by line
     try:
-        while True:
-            try:
-                line = input()
-                jd_lines.append(line)
-            except EOFError:
-                break
-            except KeyboardInterrupt:
-                break
-    except:
-        pass
-    
-    jd_text = "\n".join(jd_lines)
+        jd_text = sys.stdin.read()
+    except KeyboardInterrupt:
+        # Ctrl+C cancels the run; finish the paste with EOF instead
+        print("\n❌ Input cancelled.")
+        return None
     
     if not jd_text.strip():
         print("❌ Error: Job description cannot be empty.")